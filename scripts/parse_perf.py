@@ -1,43 +1,184 @@
 import logging
 import os
+from typing import List, Tuple
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as ds
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
 
-def parse():
-    results_dir = "results"
+INDEX_COLS = [
+    "sample_shift", "workload", "num_blocks", "zipf_theta", "rand_seed"
+]
+# only load the columns used below, with explicit types to skip inference;
+# zipf_theta stays float64: plot scripts compare it against float literals.
+# Both the pandas and the Arrow readers derive their column types from here.
+PERF_DTYPES = {
+    "sample_shift": "int16",
+    "workload": "str",
+    "num_blocks": "int64",
+    "zipf_theta": "float64",
+    "rand_seed": "int32",
+    "num_ops": "int64",
+    "baseline_us": "float64",
+    "ghost_us": "float64",
+    "sampled_us": "float64",
+    "avg_err": "float64",
+    "max_err": "float64",
+}
+
+STR_COLS = [c for c, t in PERF_DTYPES.items() if t == "str"]
+# read as strings and converted to categories once all rows are loaded: each
+# perf.csv holds a single workload, so per-file categories would not survive
+# `pd.concat`
+CATEGORY_COLS = ["workload"]
+# leading whitespace in fields is dropped by both readers
+SKIP_INITIAL_SPACE = True
+
+GROUP_COLS = INDEX_COLS[:-1]
+VALUE_COLS = [c for c in PERF_DTYPES if c not in INDEX_COLS] + [
+    "ghost_cost_us_per_op", "sampled_cost_us_per_op"
+]
+
+
+def read_perf_csv(path: str) -> pd.DataFrame:
+    return pd.read_csv(path,
+                       header=0,
+                       usecols=list(PERF_DTYPES),
+                       dtype=PERF_DTYPES,
+                       skipinitialspace=SKIP_INITIAL_SPACE)
+
+
+def to_categorical(df: pd.DataFrame):
+    for col in CATEGORY_COLS:
+        df[col] = df[col].astype("category")
+
+
+def save_parquet(df: pd.DataFrame, path: str):
+    # parquet keeps dtypes and is much faster to load than csv; the csv files
+    # are still written for compatibility
+    if HAS_PYARROW:
+        df.to_parquet(path, engine="pyarrow", compression="snappy")
+
+
+def find_perf_csvs(results_dir: str) -> List[str]:
+    paths = []
+    with os.scandir(results_dir) as it:
+        for entry in it:
+            # skip regular files, e.g., the perf_*.csv written by `parse`
+            if not entry.is_dir():
+                continue
+            if not entry.name.startswith("sr"):
+                logging.warning(f"Unknown subdirectory: {entry.path}")
+                continue
+            paths.append(f"{entry.path}/perf.csv")
+    return paths
 
-    df_all = None
-
-    for subdir in os.listdir(results_dir):
-        if not subdir.startswith("sr"):
-            logging.warning(f"Unknown subdirectory: {results_dir}/{subdir}")
-            continue
-        df = pd.read_csv(f"{results_dir}/{subdir}/perf.csv",
-                         header=0,
-                         index_col=[
-                             "sample_shift", "workload", "num_blocks",
-                             "zipf_theta", "rand_seed"
-                         ],
-                         skipinitialspace=True)
-        df_all = df if df_all is None else pd.concat([df_all, df])
 
+# `aggregate_pandas` and `aggregate_arrow` must return the same frames for the
+# same input; `parse` uses the latter whenever pyarrow is installed
+def aggregate_pandas(
+        paths: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # collect all frames first and concatenate once; concatenating inside the
+    # loop would copy the accumulated frame on every iteration
+    frames = [read_perf_csv(path) for path in paths]
+    # all frames share the same columns (`usecols`), so there is nothing to
+    # align or sort
+    df_all = pd.concat(frames, sort=False)
+    if SKIP_INITIAL_SPACE:
+        # `skipinitialspace` does not cover the first field of a line
+        for col in STR_COLS:
+            df_all[col] = df_all[col].str.lstrip()
+    to_categorical(df_all)
+    df_all = df_all.set_index(INDEX_COLS)
+
+    # operate on the underlying arrays to skip pandas index alignment
+    num_ops = df_all["num_ops"].to_numpy()
+    baseline_us = df_all["baseline_us"].to_numpy()
     df_all["ghost_cost_us_per_op"] = \
-        (df_all["ghost_us"] - df_all["baseline_us"]) / df_all["num_ops"]
+        (df_all["ghost_us"].to_numpy() - baseline_us) / num_ops
     df_all["sampled_cost_us_per_op"] = \
-        (df_all["sampled_us"] - df_all["baseline_us"]) / df_all["num_ops"]
+        (df_all["sampled_us"].to_numpy() - baseline_us) / num_ops
+
+    df_raw = df_all.sort_values(by=GROUP_COLS).reset_index()
+
+    df_group = df_all.groupby(by=GROUP_COLS, observed=True)
+
+    # compute both statistics in a single pass over the groups
+    df_agg = df_group.agg(["mean", "std"])
+    df_mean = df_agg.xs("mean", axis=1, level=1).reset_index()
+    df_std = df_agg.xs("std", axis=1, level=1).reset_index()
+    return df_raw, df_mean, df_std
+
+
+def aggregate_arrow(
+        paths: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # scan all csv files as one dataset and compute in Arrow; the results are
+    # converted to pandas only at the end
+    column_types = {
+        c: pa.string() if t == "str" else pa.from_numpy_dtype(t)
+        for c, t in PERF_DTYPES.items()
+    }
+    csv_format = ds.CsvFileFormat(convert_options=pa_csv.ConvertOptions(
+        column_types=column_types))
+    tbl = ds.dataset(paths, format=csv_format).to_table(
+        columns=list(PERF_DTYPES))
+    if SKIP_INITIAL_SPACE:
+        # Arrow already ignores whitespace around numbers, but not in strings
+        for col in STR_COLS:
+            tbl = tbl.set_column(tbl.schema.get_field_index(col), col,
+                                 pc.utf8_ltrim_whitespace(tbl[col]))
 
-    df_raw = df_all.sort_values(
-        by=["sample_shift", "workload", "num_blocks", "zipf_theta"])
-    df_raw.to_csv(f"{results_dir}/perf_raw.csv")
+    for col, us_col in [("ghost_cost_us_per_op", "ghost_us"),
+                        ("sampled_cost_us_per_op", "sampled_us")]:
+        tbl = tbl.append_column(
+            col,
+            pc.divide(pc.subtract(tbl[us_col], tbl["baseline_us"]),
+                      pc.cast(tbl["num_ops"], pa.float64())))
 
-    df_group = df_all.groupby(
-        by=["sample_shift", "workload", "num_blocks", "zipf_theta"])
+    tbl_raw = tbl.select(INDEX_COLS + VALUE_COLS).sort_by([
+        (c, "ascending") for c in GROUP_COLS
+    ])
+
+    # ddof=1 to match pandas' std
+    tbl_agg = tbl.group_by(GROUP_COLS).aggregate(
+        [(c, "mean") for c in VALUE_COLS] +
+        [(c, "stddev", pc.VarianceOptions(ddof=1)) for c in VALUE_COLS])
+    tbl_agg = tbl_agg.sort_by([(c, "ascending") for c in GROUP_COLS])
+    df_mean = tbl_agg.select(GROUP_COLS + [f"{c}_mean" for c in VALUE_COLS]
+                             ).rename_columns(GROUP_COLS +
+                                              VALUE_COLS).to_pandas()
+    df_std = tbl_agg.select(GROUP_COLS + [f"{c}_stddev" for c in VALUE_COLS]
+                            ).rename_columns(GROUP_COLS +
+                                             VALUE_COLS).to_pandas()
+    df_raw = tbl_raw.to_pandas()
+    # keep the same dtypes as the pandas path
+    for df in (df_raw, df_mean, df_std):
+        to_categorical(df)
+    return df_raw, df_mean, df_std
+
+
+def parse():
+    results_dir = "results"
 
-    df_mean = df_group.mean().reset_index()
-    df_std = df_group.std().reset_index()
+    paths = find_perf_csvs(results_dir)
+    if HAS_PYARROW:
+        df_raw, df_mean, df_std = aggregate_arrow(paths)
+    else:
+        df_raw, df_mean, df_std = aggregate_pandas(paths)
 
+    # both paths produce the same frames, so the outputs have the same format
+    df_raw.to_csv(f"{results_dir}/perf_raw.csv", index=False)
+    save_parquet(df_raw, f"{results_dir}/perf_raw.parquet")
     df_mean.to_csv(f"{results_dir}/perf_mean.csv")
     df_std.to_csv(f"{results_dir}/perf_std.csv")
+    save_parquet(df_mean, f"{results_dir}/perf_mean.parquet")
+    save_parquet(df_std, f"{results_dir}/perf_std.parquet")
 
     return df_mean, df_std
 
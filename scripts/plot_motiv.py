@@ -1,40 +1,46 @@
+import functools
 import pandas as pd
 import math
+import numpy as np
+import matplotlib
+
+matplotlib.use("Agg")  # figures are only saved to files
 import matplotlib.pyplot as plt
 from typing import List, Tuple
 from plot_util import *
 
 results_dir = "results_motiv"
+HIT_RATE_DTYPES = {"num_blocks": "int64", "hit_rate": "float64"}
 
 
+@functools.lru_cache(maxsize=None)
 def load_hit_rate_data(name: str):
     ghost_df = pd.read_csv(f"{results_dir}/{name}/hit_rate_ghost.csv",
                            na_values="nan",
+                           dtype=HIT_RATE_DTYPES,
                            skipinitialspace=True)
     sampled_df = pd.read_csv(f"{results_dir}/{name}/hit_rate_sampled.csv",
                              na_values="nan",
+                             dtype=HIT_RATE_DTYPES,
                              skipinitialspace=True)
     return ghost_df, sampled_df
 
 
 def get_motiv(df: pd.DataFrame) -> Tuple[List[float], List[float]]:
-    data = df.values.tolist()
-    size_list, motiv_list = [], []
+    data = df.to_numpy()
     window_len = 2
-    blk2GB = lambda b: b / (256 * 1024)
-    for i in range(window_len, len(data) - window_len):
-        left_size, left_hit_rate = data[i - window_len]
-        right_size, right_hit_rate = data[i + window_len]
-        curr_size, curr_hit_rate = data[i]
-        left_miss_rate = 1 - left_hit_rate
-        right_miss_rate = 1 - right_hit_rate
-        curr_miss_rate = 1 - curr_hit_rate
-        deriv = (right_miss_rate - left_miss_rate) / \
-            blk2GB(right_size - left_size)
-        size_list.append(blk2GB(curr_size))
-        motiv_list.append(-deriv / curr_miss_rate if curr_miss_rate != 0 \
-            else math.nan)
-    return size_list, motiv_list
+    size = data[:, 0] / (256 * 1024)  # unit: GB
+    miss_rate = 1 - data[:, 1]
+    left_size, right_size = size[:-2 * window_len], size[2 * window_len:]
+    left_miss_rate = miss_rate[:-2 * window_len]
+    right_miss_rate = miss_rate[2 * window_len:]
+    curr_size = size[window_len:-window_len]
+    curr_miss_rate = miss_rate[window_len:-window_len]
+    deriv = (right_miss_rate - left_miss_rate) / (right_size - left_size)
+    # only divide where the miss rate is nonzero; others are left as NaN
+    motiv = np.full_like(curr_miss_rate, math.nan)
+    np.divide(-deriv, curr_miss_rate, out=motiv, where=curr_miss_rate != 0)
+    return curr_size.tolist(), motiv.tolist()
 
 
 def plot_miss_rate(ax):
@@ -45,10 +51,11 @@ def plot_miss_rate(ax):
             "unif_s1G",
     ]:
         ghost_df, _ = load_hit_rate_data(name)
-        ghost_df["miss_rate"] = (1 - ghost_df["hit_rate"]) * 100
-        ghost_df["size"] = ghost_df["num_blocks"] / (256 * 1024)
-        ax.plot(ghost_df["size"],
-                ghost_df["miss_rate"],
+        # do not add columns to `ghost_df`: it is shared through the cache
+        miss_rate = (1 - ghost_df["hit_rate"].to_numpy()) * 100
+        size = ghost_df["num_blocks"].to_numpy() / (256 * 1024)
+        ax.plot(size,
+                miss_rate,
                 label=label_map[name],
                 color=color_map[name],
                 linestyle=linestyle_map[name])
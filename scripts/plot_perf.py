@@ -1,25 +1,47 @@
+import os
 import pandas as pd
-import math
 import matplotlib
+
+matplotlib.use("Agg")  # figures are only saved to files
 import matplotlib.pyplot as plt
 from typing import Tuple
 from plot_util import *
-from parse_perf import parse
+from parse_perf import parse, HAS_PYARROW
 
 results_dir = "results"
 sample_shift_list = [3, 4, 5, 6, 7, 8]
 
+PLOT_INDEX_COLS = ["workload", "num_blocks", "zipf_theta", "sample_shift"]
+
+# columns used by `plot`
+RESULT_DTYPES = {
+    "sample_shift": "int16",
+    "workload": "category",
+    "num_blocks": "int64",
+    "zipf_theta": "float64",
+    "avg_err": "float64",
+    "sampled_cost_us_per_op": "float64",
+}
+
 matplotlib.rcParams['pdf.fonttype'] = 42
 matplotlib.rcParams['ps.fonttype'] = 42
 
 
+def load_result(name: str) -> pd.DataFrame:
+    # prefer the parquet file written by `parse` if available
+    parquet_path = f"{results_dir}/{name}.parquet"
+    if HAS_PYARROW and os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path, engine="pyarrow")
+    return pd.read_csv(f"{results_dir}/{name}.csv",
+                       header=0,
+                       index_col=False,
+                       usecols=list(RESULT_DTYPES),
+                       dtype=RESULT_DTYPES)
+
+
 def load_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
-    df_mean = pd.read_csv(f"{results_dir}/perf_mean.csv",
-                          header=0,
-                          index_col=False)
-    df_std = pd.read_csv(f"{results_dir}/perf_std.csv",
-                         header=0,
-                         index_col=False)
+    df_mean = load_result("perf_mean")
+    df_std = load_result("perf_std")
     return df_mean, df_std
 
 
@@ -28,37 +50,24 @@ def plot(df_mean: pd.DataFrame, df_std: pd.DataFrame):
     ax_err.spines[['right', 'top']].set_visible(False)
     ax_cost.spines[['right', 'top']].set_visible(False)
 
+    # index once so that each curve below is a MultiIndex lookup
+    df_mean = df_mean.set_index(PLOT_INDEX_COLS).sort_index()
+    df_std = df_std.set_index(PLOT_INDEX_COLS).sort_index()
+
     for wl, ws, theta, name in [
         ("unif", 1024 * 1024 * 1024 / 4096, 0, "unif_s1G"),
         ("zipf", 1024 * 1024 * 1024 / 4096, 0.99, "zipf_s1G_z0.99"),
         ("zipf", 2 * 1024 * 1024 * 1024 / 4096, 0.5, "zipf_s2G_z0.5"),
     ]:
-        make_curve(
-            ax_err,
-            df_mean,
-            x_col="sample_shift",
-            y_col="avg_err",
-            x_range=sample_shift_list,
-            filters={
-                "workload": wl,
-                "num_blocks": ws,
-                "zipf_theta": theta,
-            },
-            y_trans=lambda x: x * 100,  # unit: %
-            df_err=df_std,
-            name=name)
-        make_curve(
-            ax_cost,
+        make_curves_indexed(
+            [
+                (ax_err, "avg_err", lambda x: x * 100),  # unit: %
+                (ax_cost, "sampled_cost_us_per_op",
+                 lambda x: x * 1000),  # unit: us -> ns
+            ],
             df_mean,
-            x_col="sample_shift",
-            y_col="sampled_cost_us_per_op",
+            key=(wl, ws, theta),
             x_range=sample_shift_list,
-            filters={
-                "workload": wl,
-                "num_blocks": ws,
-                "zipf_theta": theta,
-            },
-            y_trans=lambda x: x * 1000,  # unit: us -> ns
             df_err=df_std,
             name=name)
     ax_err.set_ylim([0, 4])
@@ -1,7 +1,10 @@
 import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")  # figures are only saved to files
 import matplotlib.pyplot as plt
 import numpy as np
-from typing import List, Dict, Callable, Optional
+from typing import List, Dict, Callable, Optional, Tuple
 
 SUBFIG_WIDTH = 2.5
 SUBFIG_HEIGHT = 1.8
@@ -13,6 +16,8 @@ plt.rcParams['ytick.major.pad'] = '2'
 plt.rcParams['xtick.major.size'] = '2.5'
 plt.rcParams['ytick.major.size'] = '2.5'
 plt.rcParams['axes.labelpad'] = '1'
+# tight layout is set explicitly on each figure
+plt.rcParams['figure.autolayout'] = False
 
 color_map = {
     "zipf_s1G_z0.99": "0.5",
@@ -51,6 +56,100 @@ def get_subplots(nrows: int, ncols: int):
     return fig, axes
 
 
+def _select_curve(indexed_df: pd.DataFrame, key: Tuple, x_range: List[int],
+                  err_suffix: str) -> np.ndarray:
+    """Return the positions of the rows matching `key`, one per x in `x_range`
+    (in order)
+    """
+    index = indexed_df.index
+    x_col = index.names[-1]
+    # rows sharing the same key prefix are contiguous in a sorted index
+    if not index.is_monotonic_increasing:
+        raise ValueError("Index must be sorted (e.g., by `sort_index()`)")
+    if not key:
+        start, stop = 0, len(indexed_df)
+    elif any(
+            isinstance(level.dtype, pd.CategoricalDtype)
+            and val not in level.dtype.categories
+            for level, val in zip(index.levels, key)):
+        # `slice_locs` raises TypeError for a value missing from a categorical
+        # level; there are just no matching rows
+        start, stop = 0, 0
+    else:
+        start, stop = index.slice_locs(key, key)
+    # slice first so that only the matching rows are materialized
+    x_vals = index[start:stop].get_level_values(x_col)
+    pos = np.empty(len(x_range), dtype=np.intp)
+    for i, x_val in enumerate(x_range):
+        matches = np.flatnonzero(x_vals == x_val)
+        if len(matches) != 1:
+            raise ValueError(f"Unexpected data{err_suffix}: "
+                             f"({x_col}={x_val}): {len(matches)} rows")
+        pos[i] = start + matches[0]
+    return pos
+
+
+def make_curves_indexed(curves: List[Tuple],
+                        df: pd.DataFrame,
+                        key: Tuple,
+                        x_range: List[int],
+                        name,
+                        df_err: Optional[pd.DataFrame] = None,
+                        markersize=MARKER_SIZE):
+    """Same as `make_curves`, but on frames already indexed by the filter
+    columns followed by the x column; `key` holds the filter values
+    """
+    pos = _select_curve(df, key, x_range, "")
+    sub = df.iloc[pos]
+    sub_err = None
+    if df_err is not None:
+        # mean and std frames usually come from the same groupby, so the rows
+        # found in `df` can be reused directly
+        pos_err = pos if df_err.index.equals(df.index) else _select_curve(
+            df_err, key, x_range, " (err bar)")
+        sub_err = df_err.iloc[pos_err]
+
+    style = {
+        "color": color_map[name],
+        "linestyle": linestyle_map[name],
+        "marker": marker_map.get(name),
+        "markersize": markersize,
+        "label": label_map[name],
+    }
+    for ax, y_col, y_trans in curves:
+        y_data = y_trans(sub[y_col].to_numpy())
+        if df_err is None:
+            ax.plot(x_range, y_data, **style)
+        else:
+            y_err = y_trans(sub_err[y_col].to_numpy())
+            ax.errorbar(x_range, y_data, yerr=y_err, capsize=2, **style)
+
+
+def make_curves(curves: List[Tuple],
+                df: pd.DataFrame,
+                x_col: str,
+                x_range: List[int],
+                filters: Dict,
+                name,
+                df_err: Optional[pd.DataFrame] = None,
+                markersize=MARKER_SIZE):
+    """Plot multiple curves that share the same filters
+
+    Each element of `curves` is a tuple (ax, y_col, y_trans); the filtered data
+    is only looked up once for all of them. `y_trans` is applied to an array.
+    """
+    key_cols = list(filters.keys()) + [x_col]
+    make_curves_indexed(
+        curves,
+        df.set_index(key_cols).sort_index(),
+        key=tuple(filters.values()),
+        x_range=x_range,
+        name=name,
+        df_err=None
+        if df_err is None else df_err.set_index(key_cols).sort_index(),
+        markersize=markersize)
+
+
 def make_curve(ax,
                df: pd.DataFrame,
                x_col: str,
@@ -61,46 +160,14 @@ def make_curve(ax,
                y_trans: Callable = lambda x: x,
                df_err: Optional[pd.DataFrame] = None,
                markersize=MARKER_SIZE):
-    filter_df = df
-    filter_df_err = df_err
-    for fk, fv in filters.items():
-        filter_df = filter_df[(filter_df[fk] == fv)]
-        if df_err is not None:
-            filter_df_err = filter_df_err[(filter_df_err[fk] == fv)]
-
-    y_data = []
-    y_err = []
-    for x_val in x_range:
-        d = filter_df[(filter_df[x_col] == x_val)]
-        if d.shape[0] != 1:
-            raise ValueError(f"Unexpected data: ({x_col}={x_val}): "
-                             f"shape {d.shape}")
-        y_data.append(y_trans(d.head(1)[y_col].values[0]))
-        if df_err is None:
-            continue
-        d = filter_df_err[(filter_df_err[x_col] == x_val)]
-        if d.shape[0] != 1:
-            raise ValueError(f"Unexpected data (err bar): ({x_col}={x_val}): "
-                             f"shape {d.shape}")
-        y_err.append(y_trans(d.head(1)[y_col].values[0]))
-    if df_err is None:
-        ax.plot(x_range,
-                y_data,
-                color=color_map[name],
-                linestyle=linestyle_map[name],
-                marker=marker_map[name],
-                markersize=markersize,
-                label=label_map[name])
-    else:
-        ax.errorbar(x_range,
-                    y_data,
-                    yerr=y_err,
-                    color=color_map[name],
-                    capsize=2,
-                    linestyle=linestyle_map[name],
-                    marker=marker_map[name],
-                    markersize=markersize,
-                    label=label_map[name])
+    make_curves([(ax, y_col, y_trans)],
+                df,
+                x_col=x_col,
+                x_range=x_range,
+                filters=filters,
+                name=name,
+                df_err=df_err,
+                markersize=markersize)
 
 
 def make_legend(keys: List[str],